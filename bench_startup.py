@@ -0,0 +1,136 @@
+"""Бенчмарк запуска дашбордов.
+
+Для каждого скрипта измеряет:
+- запуск сервера: время от `streamlit run` до ответа /_stcore/health.
+  Скрипт при этом не выполняется, так что это время загрузки самого
+  Streamlit, и ленивые импорты на него не влияют;
+- первая страница: первый прогон скрипта в свежем интерпретаторе
+  (через streamlit.testing) и тяжёлые модули, загруженные к этому моменту;
+- первый анализ: первая страница плюс анализ подставленного видео, без
+  учёта имитации инференса. Сюда входят загрузка модели, pandas и
+  построение графиков, перенесённые из старта в первое использование.
+
+Запуск: python bench_startup.py [dashboard.py ...] [--repeat N]
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+SCRIPTS = ['dashboard.py', 'dashboardv2.py', 'dashboardv3.py']
+HEAVY_MODULES = ['numpy', 'pandas', 'plotly.express', 'plotly.graph_objects', 'cv2']
+
+# Код, выполняемый в отдельном процессе; argv: скрипт, сценарий, модули
+SCENARIO_CODE = """
+import json, os, sys, time, types
+script, scenario, modules = sys.argv[1], sys.argv[2], sys.argv[3:]
+start = time.perf_counter()
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+if scenario == 'analysis':
+    os.environ['DASHBOARD_METRICS'] = '1'
+    # AppTest не умеет загружать файлы, поэтому подставляем загруженное видео
+    upload = types.SimpleNamespace(size=1024, type='video/mp4', file_id='bench')
+    st.file_uploader = lambda *args, **kwargs: upload
+    st.video = lambda *args, **kwargs: None
+at = AppTest.from_file(script, default_timeout=120)
+at.run()
+if scenario == 'analysis' and not at.exception:
+    at.button[0].click().run()
+elapsed = time.perf_counter() - start
+if at.exception:
+    print(json.dumps({'error': at.exception[0].message}))
+    sys.exit(1)
+result = {'seconds': elapsed, 'loaded': [m for m in modules if m in sys.modules]}
+if scenario == 'analysis':
+    import metrics
+    timers = metrics.REGISTRY.to_dict()['timers']
+    result['seconds'] -= timers['inference']['sum']
+    result['model_load'] = timers['model_load']['sum']
+print(json.dumps(result))
+"""
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def measure_server_boot(script, timeout=60):
+    port = _free_port()
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, '-m', 'streamlit', 'run', script,
+         '--server.headless', 'true', '--server.port', str(port),
+         '--browser.gatherUsageStats', 'false'],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            if proc.poll() is not None:
+                raise RuntimeError(f"{script}: streamlit завершился с кодом {proc.returncode}")
+            try:
+                with urllib.request.urlopen(f'http://127.0.0.1:{port}/_stcore/health', timeout=1) as resp:
+                    if resp.status == 200:
+                        return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.05)
+        raise TimeoutError(f"{script}: сервер не ответил за {timeout} сек")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def measure_scenario(script, scenario):
+    result = subprocess.run(
+        [sys.executable, '-c', SCENARIO_CODE, script, scenario, *HEAVY_MODULES],
+        capture_output=True,
+        text=True,
+    )
+    lines = result.stdout.strip().splitlines()
+    data = json.loads(lines[-1]) if lines else {'error': result.stderr.strip()}
+    if result.returncode != 0 or 'error' in data:
+        raise RuntimeError(f"{script} ({scenario}): {data.get('error') or result.stderr.strip()}")
+    return data
+
+
+def _positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError("должно быть не меньше 1")
+    return number
+
+
+def _summary(values):
+    return f"мин {min(values):.3f} сек, среднее {sum(values) / len(values):.3f} сек"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Замер запуска дашбордов")
+    parser.add_argument('scripts', nargs='*', default=SCRIPTS)
+    parser.add_argument('--repeat', type=_positive_int, default=3)
+    args = parser.parse_args()
+
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+    for script in args.scripts:
+        boot = [measure_server_boot(script) for _ in range(args.repeat)]
+        pages = [measure_scenario(script, 'first_page') for _ in range(args.repeat)]
+        analyses = [measure_scenario(script, 'analysis') for _ in range(args.repeat)]
+        print(f"{script}:")
+        print(f"  запуск сервера   {_summary(boot)}")
+        print(f"  первая страница  {_summary([p['seconds'] for p in pages])}")
+        print(f"  загружено        {', '.join(pages[-1]['loaded']) or '-'}")
+        print(f"  первый анализ    {_summary([a['seconds'] for a in analyses])}"
+              f" (загрузка модели {_summary([a['model_load'] for a in analyses])})")
+        print(f"  загружено        {', '.join(analyses[-1]['loaded']) or '-'}")
+
+
+if __name__ == '__main__':
+    main()
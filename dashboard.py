@@ -1,7 +1,10 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
-import plotly.express as px
+
+# numpy, pandas и plotly импортируются при первом использовании,
+# чтобы стартовая страница открывалась без загрузки тяжёлых модулей
+from metrics import Metrics, render_panel
+
+metrics = Metrics()
 
 # Настройка страницы
 st.set_page_config(
@@ -41,6 +44,8 @@ class VideoAnalyzer:
         self.classes = ['человек', 'автомобиль', 'животное', 'лицо']
 
     def analyze_frame(self, frame_num):
+        import numpy as np
+
         np.random.seed(frame_num)
         detections = []
 
@@ -54,10 +59,66 @@ class VideoAnalyzer:
         return detections
 
 
+# Модель загружается и прогревается один раз на процесс и общая для всех сессий
+@st.cache_resource
+def load_analyzer():
+    with metrics.timer('model_load'):
+        analyzer = VideoAnalyzer()
+        analyzer.analyze_frame(0)
+    return analyzer
+
+
+# Агрегаты и графики кэшируются по входным данным и параметрам фильтров
+@st.cache_data
+def compute_stats(df):
+    # Выполняется только при промахе кэша: здесь учитывается реальная работа
+    with metrics.timer('aggregation'):
+        stats = {
+            'unique_classes': df['class'].nunique(),
+            'mean_confidence': df['confidence'].mean(),
+        }
+    metrics.inc('rows_aggregated', len(df))
+    return stats
+
+
+@st.cache_data
+def build_class_pie(df, classes):
+    import plotly.express as px
+
+    return px.pie(df[df['class'].isin(classes)], names='class', title='Распределение по классам')
+
+
+@st.cache_data
+def build_confidence_bar(df, classes):
+    import plotly.express as px
+
+    return px.bar(df[df['class'].isin(classes)], x='class', y='confidence', title='Уверенность по классам')
+
+
+# Фрагменты перезапускаются отдельно от остального скрипта при изменении своих фильтров
+@st.fragment
+def class_pie_fragment(df):
+    with metrics.fragment_timer():
+        all_classes = sorted(df['class'].unique())
+        classes = st.multiselect("Классы", all_classes, default=all_classes, key='pie_classes')
+        with metrics.timer('charts'):
+            st.plotly_chart(build_class_pie(df, tuple(classes)))
+
+
+@st.fragment
+def confidence_bar_fragment(df):
+    with metrics.fragment_timer():
+        all_classes = sorted(df['class'].unique())
+        classes = st.multiselect("Классы", all_classes, default=all_classes, key='bar_classes')
+        with metrics.timer('charts'):
+            st.plotly_chart(build_confidence_bar(df, tuple(classes)))
+
+
 # Основная логика
 if uploaded_file:
     st.subheader("📹 Предпросмотр видео")
-    st.video(uploaded_file)
+    with metrics.timer('video_preview'):
+        st.video(uploaded_file)
 
     st.subheader("📊 Информация о видео")
     col1, col2, col3 = st.columns(3)
@@ -68,54 +129,72 @@ if uploaded_file:
     with col3:
         st.metric("Тип файла", uploaded_file.type)
 
-if analyze_btn and uploaded_file:
+# Результаты хранятся в сессии, чтобы не пропадать при взаимодействии с виджетами
+has_results = uploaded_file and st.session_state.get('results_file_id') == uploaded_file.file_id
+
+if (analyze_btn or has_results) and uploaded_file:
+    import pandas as pd
+
     st.subheader("📈 Результаты анализа")
 
-    progress_bar = st.progress(0)
-    status_text = st.empty()
+    if analyze_btn:
+        progress_bar = st.progress(0)
+        status_text = st.empty()
+
+        analyzer = load_analyzer()
+        all_detections = []
+
+        # Имитация анализа
+        for i in range(10):
+            progress_bar.progress((i + 1) * 10)
+            status_text.text(f"Анализ кадра {i + 1}/10")
 
-    analyzer = VideoAnalyzer()
-    all_detections = []
+            with metrics.timer('inference'):
+                detections = analyzer.analyze_frame(i)
 
-    # Имитация анализа
-    for i in range(10):
-        progress_bar.progress((i + 1) * 10)
-        status_text.text(f"Анализ кадра {i + 1}/10")
+                # Имитация задержки
+                import time
 
-        detections = analyzer.analyze_frame(i)
-        all_detections.extend(detections)
+                time.sleep(0.5)
+            all_detections.extend(detections)
+            metrics.inc('frames_decoded')
 
-        # Имитация задержки
-        import time
+        # Кадры пока не пропускаются, счётчик держим для единого набора метрик
+        metrics.inc('frames_skipped', 0)
+        status_text.text("Анализ завершен!")
 
-        time.sleep(0.5)
+        with metrics.timer('dataframe'):
+            st.session_state['results_df'] = pd.DataFrame(all_detections)
+        st.session_state['results_file_id'] = uploaded_file.file_id
 
-    status_text.text("Анализ завершен!")
+    df = st.session_state['results_df']
 
     # Показ результатов
-    if all_detections:
-        df = pd.DataFrame(all_detections)
+    if not df.empty:
+        # stats — вызов с поиском в кэше, сама агрегация замеряется внутри при промахе
+        with metrics.timer('stats'):
+            stats = compute_stats(df)
 
         st.subheader("📊 Статистика")
         col1, col2, col3 = st.columns(3)
         with col1:
             st.metric("Всего объектов", len(df))
         with col2:
-            st.metric("Уникальные классы", df['class'].nunique())
+            st.metric("Уникальные классы", stats['unique_classes'])
         with col3:
-            st.metric("Средняя уверенность", f"{df['confidence'].mean():.2f}")
+            st.metric("Средняя уверенность", f"{stats['mean_confidence']:.2f}")
 
         st.subheader("📋 Таблица обнаружений")
         st.dataframe(df)
 
         st.subheader("📈 Визуализация")
-        fig = px.pie(df, names='class', title='Распределение по классам')
-        st.plotly_chart(fig)
-
-        fig2 = px.bar(df, x='class', y='confidence', title='Уверенность по классам')
-        st.plotly_chart(fig2)
+        class_pie_fragment(df)
+        confidence_bar_fragment(df)
     else:
         st.warning("Объекты не обнаружены")
 
 else:
-    st.info("👈 Загрузите видеофайл и настройте параметры анализа")
\ No newline at end of file
+    st.info("👈 Загрузите видеофайл и настройте параметры анализа")
+
+metrics.finish()
+render_panel(metrics)
@@ -1,10 +1,12 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
 from datetime import datetime
 
+# numpy, pandas и plotly импортируются при первом использовании,
+# чтобы стартовая страница открывалась без загрузки тяжёлых модулей
+from metrics import Metrics, render_panel
+
+metrics = Metrics()
+
 # Настройка страницы
 st.set_page_config(
     page_title="Анализатор видео - PyCharm",
@@ -47,6 +49,8 @@ class VideoAnalyzer:
         ]
 
     def analyze_frame(self, frame_num):
+        import numpy as np
+
         np.random.seed(frame_num)
         detections = []
 
@@ -79,10 +83,122 @@ class VideoAnalyzer:
         return dangerous_frames
 
 
+# Модель загружается и прогревается один раз на процесс и общая для всех сессий
+@st.cache_resource
+def load_analyzer():
+    with metrics.timer('model_load'):
+        analyzer = VideoAnalyzer()
+        analyzer.analyze_frame(0)
+    return analyzer
+
+
+# Агрегаты и графики кэшируются по входным данным и параметрам фильтров
+@st.cache_data
+def compute_stats(df, analysis_frequency):
+    # Выполняется только при промахе кэша: здесь учитывается реальная работа
+    with metrics.timer('aggregation'):
+        # Расчет дополнительных метрик
+        human_detections = df[df['class'] == 'человек']
+
+        stats = {
+            'unique_classes': df['class'].nunique(),
+            'mean_confidence': df['confidence'].mean(),
+            'human_count': len(human_detections),
+            # Среднее время человека в кадре
+            'avg_human_time': len(human_detections) * (1 / analysis_frequency) if len(human_detections) > 0 else 0,
+            # Средняя скорость человека
+            'avg_human_speed': human_detections['speed'].mean() if len(human_detections) > 0 else 0,
+            'ppe_compliance': (human_detections['has_ppe'].mean() * 100) if len(human_detections) > 0 else 100,
+        }
+    metrics.inc('rows_aggregated', len(df))
+    return stats
+
+
+@st.cache_data
+def build_danger_bar(danger_df):
+    import plotly.express as px
+
+    danger_by_type = danger_df['Тип действия'].value_counts()
+    return px.bar(
+        x=danger_by_type.index,
+        y=danger_by_type.values,
+        title="Распределение опасных действий по типам",
+        labels={'x': 'Тип действия', 'y': 'Количество'}
+    )
+
+
+@st.cache_data
+def build_class_pie(df, classes):
+    import plotly.express as px
+
+    return px.pie(df[df['class'].isin(classes)], names='class', title='Распределение по классам')
+
+
+@st.cache_data
+def build_confidence_bar(df, classes):
+    import plotly.express as px
+
+    return px.bar(df[df['class'].isin(classes)], x='class', y='confidence', title='Уверенность по классам')
+
+
+@st.cache_data
+def build_speed_histogram(df, nbins):
+    import plotly.express as px
+
+    return px.histogram(
+        df[df['class'] == 'человек'],
+        x='speed',
+        title='Распределение скорости людей',
+        nbins=nbins
+    )
+
+
+@st.cache_data
+def build_human_timeline(df):
+    import plotly.express as px
+
+    # Временная шкала появления людей
+    human_timeline = df[df['class'] == 'человек'].groupby('frame').size().reset_index(name='count')
+    return px.line(
+        human_timeline,
+        x='frame',
+        y='count',
+        title='Количество людей по кадрам'
+    )
+
+
+# Фрагменты перезапускаются отдельно от остального скрипта при изменении своих фильтров
+@st.fragment
+def class_pie_fragment(df):
+    with metrics.fragment_timer():
+        all_classes = sorted(df['class'].unique())
+        classes = st.multiselect("Классы", all_classes, default=all_classes, key='pie_classes')
+        with metrics.timer('charts'):
+            st.plotly_chart(build_class_pie(df, tuple(classes)))
+
+
+@st.fragment
+def confidence_bar_fragment(df):
+    with metrics.fragment_timer():
+        all_classes = sorted(df['class'].unique())
+        classes = st.multiselect("Классы", all_classes, default=all_classes, key='bar_classes')
+        with metrics.timer('charts'):
+            st.plotly_chart(build_confidence_bar(df, tuple(classes)))
+
+
+@st.fragment
+def speed_histogram_fragment(df):
+    with metrics.fragment_timer():
+        nbins = st.slider("Количество интервалов", 5, 30, 10, key='speed_nbins')
+        with metrics.timer('charts'):
+            st.plotly_chart(build_speed_histogram(df, nbins))
+
+
 # Основная логика
 if uploaded_file:
     st.subheader("📹 Предпросмотр видео")
-    st.video(uploaded_file)
+    with metrics.timer('video_preview'):
+        st.video(uploaded_file)
 
     st.subheader("📊 Информация о видео")
     col1, col2, col3 = st.columns(3)
@@ -93,57 +209,69 @@ if uploaded_file:
     with col3:
         st.metric("Тип файла", uploaded_file.type)
 
-if analyze_btn and uploaded_file:
-    st.subheader("📈 Результаты анализа")
+# Результаты хранятся в сессии, чтобы не пропадать при взаимодействии с виджетами
+has_results = uploaded_file and st.session_state.get('results_file_id') == uploaded_file.file_id
 
-    progress_bar = st.progress(0)
-    status_text = st.empty()
+if (analyze_btn or has_results) and uploaded_file:
+    import pandas as pd
 
-    analyzer = VideoAnalyzer()
-    all_detections = []
-    detections_history = []
+    st.subheader("📈 Результаты анализа")
 
-    # Имитация анализа
-    for i in range(10):
-        progress_bar.progress((i + 1) * 10)
-        status_text.text(f"Анализ кадра {i + 1}/10")
+    if analyze_btn:
+        progress_bar = st.progress(0)
+        status_text = st.empty()
 
-        detections = analyzer.analyze_frame(i)
-        all_detections.extend(detections)
-        detections_history.append(detections)
+        analyzer = load_analyzer()
+        all_detections = []
+        detections_history = []
 
-        # Имитация задержки
-        import time
+        # Имитация анализа
+        for i in range(10):
+            progress_bar.progress((i + 1) * 10)
+            status_text.text(f"Анализ кадра {i + 1}/10")
 
-        time.sleep(0.3)
+            with metrics.timer('inference'):
+                detections = analyzer.analyze_frame(i)
 
-    status_text.text("Анализ завершен!")
+                # Имитация задержки
+                import time
 
-    # Показ результатов
-    if all_detections:
-        df = pd.DataFrame(all_detections)
+                time.sleep(0.3)
+            all_detections.extend(detections)
+            detections_history.append(detections)
+            metrics.inc('frames_decoded')
 
-        # Расчет дополнительных метрик
-        human_detections = df[df['class'] == 'человек']
+        # Кадры пока не пропускаются, счётчик держим для единого набора метрик
+        metrics.inc('frames_skipped', 0)
+        status_text.text("Анализ завершен!")
 
-        # Среднее время человека в кадре
-        avg_human_time = len(human_detections) * (1 / analysis_frequency) if len(human_detections) > 0 else 0
+        with metrics.timer('dataframe'):
+            st.session_state['results_df'] = pd.DataFrame(all_detections)
+            # Количество опасных действий
+            danger_actions = analyzer.detect_danger_actions(detections_history)
+            st.session_state['danger_df'] = pd.DataFrame(danger_actions, columns=['Тип действия', 'Кадр'])
+        st.session_state['results_file_id'] = uploaded_file.file_id
 
-        # Средняя скорость человека
-        avg_human_speed = human_detections['speed'].mean() if len(human_detections) > 0 else 0
+    df = st.session_state['results_df']
+    danger_df = st.session_state['danger_df']
 
-        # Количество опасных действий
-        danger_actions = analyzer.detect_danger_actions(detections_history)
-        danger_count = len(danger_actions)
+    # Показ результатов
+    if not df.empty:
+        # stats — вызов с поиском в кэше, сама агрегация замеряется внутри при промахе
+        with metrics.timer('stats'):
+            stats = compute_stats(df, analysis_frequency)
+        avg_human_speed = stats['avg_human_speed']
+        danger_count = len(danger_df)
+        ppe_compliance = stats['ppe_compliance']
 
         st.subheader("📊 Основная статистика")
         col1, col2, col3 = st.columns(3)
         with col1:
             st.metric("Всего объектов", len(df))
         with col2:
-            st.metric("Уникальные классы", df['class'].nunique())
+            st.metric("Уникальные классы", stats['unique_classes'])
         with col3:
-            st.metric("Средняя уверенность", f"{df['confidence'].mean():.2f}")
+            st.metric("Средняя уверенность", f"{stats['mean_confidence']:.2f}")
 
         st.subheader("🚨 Анализ безопасности труда")
         col1, col2, col3, col4 = st.columns(4)
@@ -151,8 +279,8 @@ if analyze_btn and uploaded_file:
         with col1:
             st.metric(
                 "Среднее время человека в кадре",
-                f"{avg_human_time:.1f} сек",
-                delta=f"{len(human_detections)} обнаружений"
+                f"{stats['avg_human_time']:.1f} сек",
+                delta=f"{stats['human_count']} обнаружений"
             )
 
         with col2:
@@ -173,8 +301,6 @@ if analyze_btn and uploaded_file:
             )
 
         with col4:
-            ppe_compliance = (df[df['class'] == 'человек']['has_ppe'].mean() * 100) if len(
-                human_detections) > 0 else 100
             st.metric(
                 "Соблюдение СИЗ",
                 f"{ppe_compliance:.0f}%",
@@ -185,18 +311,11 @@ if analyze_btn and uploaded_file:
         # Детализация опасных действий
         if danger_count > 0:
             st.subheader("📋 Детали опасных действий")
-            danger_df = pd.DataFrame(danger_actions, columns=['Тип действия', 'Кадр'])
             st.dataframe(danger_df)
 
             # Визуализация опасных действий
-            danger_by_type = danger_df['Тип действия'].value_counts()
-            fig_danger = px.bar(
-                x=danger_by_type.index,
-                y=danger_by_type.values,
-                title="Распределение опасных действий по типам",
-                labels={'x': 'Тип действия', 'y': 'Количество'}
-            )
-            st.plotly_chart(fig_danger)
+            with metrics.timer('charts'):
+                st.plotly_chart(build_danger_bar(danger_df))
 
         st.subheader("📋 Таблица обнаружений")
         st.dataframe(df)
@@ -205,36 +324,21 @@ if analyze_btn and uploaded_file:
         col1, col2 = st.columns(2)
 
         with col1:
-            fig = px.pie(df, names='class', title='Распределение по классам')
-            st.plotly_chart(fig)
+            class_pie_fragment(df)
 
         with col2:
-            fig2 = px.bar(df, x='class', y='confidence', title='Уверенность по классам')
-            st.plotly_chart(fig2)
+            confidence_bar_fragment(df)
 
         # Дополнительные графики
-        if len(human_detections) > 0:
+        if stats['human_count'] > 0:
             col3, col4 = st.columns(2)
 
             with col3:
-                fig3 = px.histogram(
-                    human_detections,
-                    x='speed',
-                    title='Распределение скорости людей',
-                    nbins=10
-                )
-                st.plotly_chart(fig3)
+                speed_histogram_fragment(df)
 
             with col4:
-                # Временная шкала появления людей
-                human_timeline = human_detections.groupby('frame').size().reset_index(name='count')
-                fig4 = px.line(
-                    human_timeline,
-                    x='frame',
-                    y='count',
-                    title='Количество людей по кадрам'
-                )
-                st.plotly_chart(fig4)
+                with metrics.timer('charts'):
+                    st.plotly_chart(build_human_timeline(df))
 
     else:
         st.warning("Объекты не обнаружены")
@@ -292,4 +396,7 @@ st.markdown("""
     <p>Данная система анализа видео помогает выявлять потенциально опасные ситуации на рабочем месте и предоставляет рекомендации по улучшению условий труда.</p>
     <p><strong>Последнее обновление:</strong> {}</p>
 </div>
-""".format(datetime.now().strftime("%d.%m.%Y %H:%M")), unsafe_allow_html=True)
\ No newline at end of file
+""".format(datetime.now().strftime("%d.%m.%Y %H:%M")), unsafe_allow_html=True)
+
+metrics.finish()
+render_panel(metrics)
@@ -1,10 +1,12 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
 from datetime import datetime
 
+# numpy, pandas и plotly импортируются при первом использовании,
+# чтобы стартовая страница открывалась без загрузки тяжёлых модулей
+from metrics import Metrics, render_panel
+
+metrics = Metrics()
+
 # Настройка страницы
 st.set_page_config(
     page_title="Анализатор видео - Безопасность труда",
@@ -49,6 +51,8 @@ class VideoAnalyzer:
         ]
 
     def analyze_frame(self, frame_num, total_frames=100):
+        import numpy as np
+
         np.random.seed(frame_num)
         detections = []
 
@@ -94,34 +98,22 @@ class VideoAnalyzer:
         return detections
 
 
-# Основная логика
-if uploaded_file:
-    st.subheader("Предпросмотр видео")
-    st.video(uploaded_file)
-
-if analyze_btn and uploaded_file:
-    st.subheader("Результаты анализа безопасности")
-
-    progress_bar = st.progress(0)
-    status_text = st.empty()
-
-    analyzer = VideoAnalyzer()
-    all_detections = []
-
-    # Имитация анализа 100 кадров
-    total_frames = 100
-    for i in range(total_frames):
-        progress_bar.progress((i + 1) / total_frames)
-        status_text.text(f"Анализ кадра {i + 1}/{total_frames}")
-
-        detections = analyzer.analyze_frame(i, total_frames)
-        all_detections.extend(detections)
+# Модель загружается и прогревается один раз на процесс и общая для всех сессий
+@st.cache_resource
+def load_analyzer():
+    with metrics.timer('model_load'):
+        analyzer = VideoAnalyzer()
+        analyzer.analyze_frame(0)
+    return analyzer
 
-    status_text.text("Анализ завершен!")
 
-    if all_detections:
-        df = pd.DataFrame(all_detections)
+# Агрегаты и графики кэшируются по входным данным и параметрам фильтров
+@st.cache_data
+def compute_stats(df, total_frames):
+    import pandas as pd
 
+    # Выполняется только при промахе кэша: здесь учитывается реальная работа
+    with metrics.timer('aggregation'):
         # Анализ людей по кадрам
         people_detections = df[df['class'] == 'человек']
         train_detections = df[df['class'] == 'поезд']
@@ -137,13 +129,13 @@ if analyze_btn and uploaded_file:
 
         # Опасные действия
         danger_actions = people_detections[people_detections['danger_action'].notna()]
-        danger_count = len(danger_actions)
 
         # Время опасных ситуаций по кадрам
         danger_frames = danger_actions[['frame', 'timestamp', 'danger_action']].copy()
 
         # Анализ поезда
         train_arrival_time = None
+        first_train_frame = None
         train_status_by_frame = []
 
         if not train_detections.empty:
@@ -164,6 +156,141 @@ if analyze_btn and uploaded_file:
                     'status': status
                 })
 
+        # Создаем полный DataFrame по всем кадрам
+        frames_data = []
+        for frame in range(total_frames):
+            people_count = len(people_detections[people_detections['frame'] == frame])
+            frames_data.append({
+                'frame': frame,
+                'timestamp': frame / 30,
+                'people_count': people_count
+            })
+
+        people_df = pd.DataFrame(frames_data)
+    metrics.inc('rows_aggregated', len(df))
+
+    return {
+        'has_train': not train_detections.empty,
+        'max_people': max_people,
+        'max_people_frame': max_people_frame,
+        'danger_frames': danger_frames,
+        'train_arrival_time': train_arrival_time,
+        'first_train_frame': first_train_frame,
+        'train_status_by_frame': train_status_by_frame,
+        'people_df': people_df,
+    }
+
+
+@st.cache_data
+def build_people_chart(people_df, max_people, time_range):
+    import plotly.express as px
+
+    visible = people_df[people_df['timestamp'].between(*time_range)]
+    fig_people = px.line(
+        visible,
+        x='timestamp',
+        y='people_count',
+        title='Количество людей в кадре по времени',
+        labels={'timestamp': 'Время (секунды)', 'people_count': 'Количество людей'}
+    )
+    fig_people.update_traces(line=dict(color='blue', width=3))
+    fig_people.add_hline(y=max_people, line_dash="dash", line_color="red",
+                         annotation_text=f"Максимум: {max_people} чел.")
+    return fig_people
+
+
+@st.cache_data
+def build_danger_chart(danger_frames, actions):
+    import plotly.express as px
+
+    # График опасных действий по времени
+    selected = danger_frames[danger_frames['danger_action'].isin(actions)]
+    danger_timeline = selected.groupby('frame').size().reset_index(name='danger_count')
+    danger_timeline['timestamp'] = danger_timeline['frame'] / 30
+
+    return px.scatter(
+        danger_timeline,
+        x='timestamp',
+        y='danger_count',
+        title='Опасные действия по времени',
+        labels={'timestamp': 'Время (секунды)', 'danger_count': 'Количество опасных действий'}
+    )
+
+
+# Фрагменты перезапускаются отдельно от остального скрипта при изменении своих фильтров
+@st.fragment
+def people_chart_fragment(people_df, max_people):
+    with metrics.fragment_timer():
+        max_time = float(people_df['timestamp'].max())
+        time_range = st.slider("Интервал времени (сек)", 0.0, max_time, (0.0, max_time), key='people_time_range')
+        with metrics.timer('charts'):
+            st.plotly_chart(build_people_chart(people_df, max_people, time_range), use_container_width=True)
+
+
+@st.fragment
+def danger_chart_fragment(danger_frames):
+    with metrics.fragment_timer():
+        all_actions = sorted(danger_frames['danger_action'].unique())
+        actions = st.multiselect("Типы опасных действий", all_actions, default=all_actions, key='danger_actions')
+        with metrics.timer('charts'):
+            st.plotly_chart(build_danger_chart(danger_frames, tuple(actions)), use_container_width=True)
+
+
+# Основная логика
+if uploaded_file:
+    st.subheader("Предпросмотр видео")
+    with metrics.timer('video_preview'):
+        st.video(uploaded_file)
+
+# Результаты хранятся в сессии, чтобы не пропадать при взаимодействии с виджетами
+has_results = uploaded_file and st.session_state.get('results_file_id') == uploaded_file.file_id
+
+# Имитация анализа 100 кадров
+total_frames = 100
+
+if (analyze_btn or has_results) and uploaded_file:
+    import pandas as pd
+
+    st.subheader("Результаты анализа безопасности")
+
+    if analyze_btn:
+        progress_bar = st.progress(0)
+        status_text = st.empty()
+
+        analyzer = load_analyzer()
+        all_detections = []
+
+        for i in range(total_frames):
+            progress_bar.progress((i + 1) / total_frames)
+            status_text.text(f"Анализ кадра {i + 1}/{total_frames}")
+
+            with metrics.timer('inference'):
+                detections = analyzer.analyze_frame(i, total_frames)
+            all_detections.extend(detections)
+            metrics.inc('frames_decoded')
+
+        # Кадры пока не пропускаются, счётчик держим для единого набора метрик
+        metrics.inc('frames_skipped', 0)
+        status_text.text("Анализ завершен!")
+
+        with metrics.timer('dataframe'):
+            st.session_state['results_df'] = pd.DataFrame(all_detections)
+        st.session_state['results_file_id'] = uploaded_file.file_id
+
+    df = st.session_state['results_df']
+
+    if not df.empty:
+        # stats — вызов с поиском в кэше, сама агрегация замеряется внутри при промахе
+        with metrics.timer('stats'):
+            stats = compute_stats(df, total_frames)
+        max_people = stats['max_people']
+        max_people_frame = stats['max_people_frame']
+        danger_frames = stats['danger_frames']
+        danger_count = len(danger_frames)
+        train_arrival_time = stats['train_arrival_time']
+        train_status_by_frame = stats['train_status_by_frame']
+        people_df = stats['people_df']
+
         # ОСНОВНЫЕ ПОКАЗАТЕЛИ
         st.subheader("Основные показатели безопасности")
 
@@ -189,7 +316,7 @@ if analyze_btn and uploaded_file:
                 st.metric(
                     "Время прибытия поезда",
                     f"{train_arrival_time:.1f} сек",
-                    delta=f"кадр {first_train_frame}"
+                    delta=f"кадр {stats['first_train_frame']}"
                 )
             else:
                 st.metric(
@@ -198,7 +325,7 @@ if analyze_btn and uploaded_file:
                 )
 
         with col4:
-            if not train_detections.empty:
+            if stats['has_train']:
                 current_status = train_status_by_frame[-1]['status'] if train_status_by_frame else "нет поезда в кадре"
                 st.metric(
                     "Текущий статус поезда",
@@ -212,30 +339,7 @@ if analyze_btn and uploaded_file:
 
         # ГРАФИК КОЛИЧЕСТВА ЛЮДЕЙ В КАДРЕ
         st.subheader("График количества людей в кадре")
-
-        # Создаем полный DataFrame по всем кадрам
-        frames_data = []
-        for frame in range(total_frames):
-            people_count = len(people_detections[people_detections['frame'] == frame])
-            frames_data.append({
-                'frame': frame,
-                'timestamp': frame / 30,
-                'people_count': people_count
-            })
-
-        people_df = pd.DataFrame(frames_data)
-
-        fig_people = px.line(
-            people_df,
-            x='timestamp',
-            y='people_count',
-            title='Количество людей в кадре по времени',
-            labels={'timestamp': 'Время (секунды)', 'people_count': 'Количество людей'}
-        )
-        fig_people.update_traces(line=dict(color='blue', width=3))
-        fig_people.add_hline(y=max_people, line_dash="dash", line_color="red",
-                             annotation_text=f"Максимум: {max_people} чел.")
-        st.plotly_chart(fig_people, use_container_width=True)
+        people_chart_fragment(people_df, max_people)
 
         # ТАБЛИЦА КОЛИЧЕСТВА ЛЮДЕЙ ПО КАДРАМ
         st.subheader("Количество людей в кадре по фреймам")
@@ -267,18 +371,7 @@ if analyze_btn and uploaded_file:
 
             st.dataframe(danger_display, height=300, use_container_width=True)
 
-            # График опасных действий по времени
-            danger_timeline = danger_frames.groupby('frame').size().reset_index(name='danger_count')
-            danger_timeline['timestamp'] = danger_timeline['frame'] / 30
-
-            fig_danger = px.scatter(
-                danger_timeline,
-                x='timestamp',
-                y='danger_count',
-                title='Опасные действия по времени',
-                labels={'timestamp': 'Время (секунды)', 'danger_count': 'Количество опасных действий'}
-            )
-            st.plotly_chart(fig_danger, use_container_width=True)
+            danger_chart_fragment(danger_frames)
         else:
             st.success("Опасные действия не обнаружены")
 
@@ -286,4 +379,7 @@ if analyze_btn and uploaded_file:
         st.warning("Объекты не обнаружены")
 
 else:
-    st.info("Загрузите видеофайл и настройте параметры анализа")
\ No newline at end of file
+    st.info("Загрузите видеофайл и настройте параметры анализа")
+
+metrics.finish()
+render_panel(metrics, label="Производительность")
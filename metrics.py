@@ -0,0 +1,245 @@
+"""Лёгкие таймеры и счётчики для этапов пайплайна анализа видео.
+
+Включается переменной окружения DASHBOARD_METRICS=1. Метрики копятся в
+общем для процесса реестре REGISTRY: счётчики и гистограммы только растут
+и переживают перезапуски скрипта и сессии. Если задана
+DASHBOARD_METRICS_EXPORT, после каждого прогона реестр атомарно
+записывается в этот файл: в JSON для *.json, иначе в текстовом формате
+Prometheus. Когда сбор выключен, таймеры возвращают общий пустой
+контекстный менеджер и ничего не измеряют.
+"""
+import contextlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+import streamlit as st
+
+# Границы корзин гистограмм задержек (секунды)
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+_DISABLED = contextlib.nullcontext()
+
+
+def _env_enabled():
+    return os.environ.get("DASHBOARD_METRICS", "").lower() in ("1", "true", "yes", "on")
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.bucket_counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.bucket_counts[i] += 1
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'mean': self.sum / self.count if self.count else 0.0,
+            'max': self.max,
+            'buckets': dict(zip((str(b) for b in self.buckets), self.bucket_counts)),
+        }
+
+
+class Registry:
+    """Накопительные метрики процесса, общие для всех сессий"""
+
+    def __init__(self, prefix="dashboard"):
+        self.prefix = prefix
+        self.counters = {}
+        self.histograms = {}
+        self._lock = threading.Lock()
+        # Снимок, запись и подмена файла идут под одной блокировкой, чтобы
+        # более старый снимок не заменил более новый
+        self._export_lock = threading.Lock()
+
+    def inc(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name, value):
+        with self._lock:
+            if name not in self.histograms:
+                self.histograms[name] = Histogram()
+            self.histograms[name].observe(value)
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'counters': dict(self.counters),
+                'timers': {name: h.to_dict() for name, h in self.histograms.items()},
+            }
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), ensure_ascii=False, indent=2)
+
+    def to_prometheus(self):
+        lines = []
+        with self._lock:
+            for name, value in sorted(self.counters.items()):
+                metric = f"{self.prefix}_{name}_total"
+                lines.append(f"# TYPE {metric} counter")
+                lines.append(f"{metric} {value}")
+            for name, hist in sorted(self.histograms.items()):
+                metric = f"{self.prefix}_{name}_seconds"
+                lines.append(f"# TYPE {metric} histogram")
+                for bound, count in zip(hist.buckets, hist.bucket_counts):
+                    lines.append(f'{metric}_bucket{{le="{bound}"}} {count}')
+                lines.append(f'{metric}_bucket{{le="+Inf"}} {hist.count}')
+                lines.append(f"{metric}_sum {hist.sum}")
+                lines.append(f"{metric}_count {hist.count}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, path):
+        """Записывает снимок во временный файл и подменяет им path"""
+        with self._export_lock:
+            content = self.to_json() if path.endswith('.json') else self.to_prometheus()
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    f.write(content)
+                # mkstemp создаёт файл с правами 0600, а сборщику нужно его читать
+                os.chmod(tmp_path, 0o644)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+
+REGISTRY = Registry()
+
+
+class Metrics:
+    """Метрики одного прогона скрипта, дублирующиеся в общий реестр"""
+
+    def __init__(self, enabled=None, registry=None):
+        self.enabled = _env_enabled() if enabled is None else enabled
+        self.registry = REGISTRY if registry is None else registry
+        self.counters = {}
+        self.histograms = {}
+        self._started = time.perf_counter()
+        self._finished = False
+
+    def inc(self, name, value=1):
+        if not self.enabled:
+            return
+        if not self._finished:
+            self.counters[name] = self.counters.get(name, 0) + value
+        self.registry.inc(name, value)
+
+    def observe(self, name, value):
+        if not self.enabled:
+            return
+        if not self._finished:
+            if name not in self.histograms:
+                self.histograms[name] = Histogram()
+            self.histograms[name].observe(value)
+        self.registry.observe(name, value)
+
+    def timer(self, name):
+        """Контекстный менеджер, измеряющий длительность этапа в секундах"""
+        if not self.enabled:
+            return _DISABLED
+        return self._timer(name)
+
+    @contextlib.contextmanager
+    def _timer(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def fragment_timer(self, name='fragment'):
+        """Таймер тела фрагмента.
+
+        Отдельный перезапуск фрагмента идёт после finish() последнего полного
+        прогона: замер попадает только в реестр и сразу выгружается. При
+        полном прогоне выгрузку делает finish().
+        """
+        if not self.enabled:
+            return _DISABLED
+        return self._fragment_timer(name)
+
+    @contextlib.contextmanager
+    def _fragment_timer(self, name):
+        with self._timer(name):
+            yield
+        if self._finished:
+            self.flush()
+
+    def finish(self):
+        """Фиксирует время прогона скрипта и выгружает реестр, если задан файл"""
+        if not self.enabled:
+            return
+        self.observe('rerun', time.perf_counter() - self._started)
+        self._finished = True
+        self.flush()
+
+    def flush(self):
+        """Выгружает реестр в DASHBOARD_METRICS_EXPORT, если переменная задана"""
+        if not self.enabled:
+            return
+        path = os.environ.get("DASHBOARD_METRICS_EXPORT")
+        if path:
+            self.registry.export(path)
+
+
+def _timers_table(timers):
+    return [
+        {
+            'Этап': name,
+            'Вызовов': t['count'],
+            'Всего (мс)': round(t['sum'] * 1000, 2),
+            'Среднее (мс)': round(t['mean'] * 1000, 2),
+            'Максимум (мс)': round(t['max'] * 1000, 2),
+        }
+        for name, t in timers.items()
+    ]
+
+
+def render_panel(metrics, label="⏱️ Производительность"):
+    """Сворачиваемая панель с метриками текущего прогона и всего процесса"""
+    if not metrics.enabled:
+        return
+
+    with st.expander(label, expanded=False):
+        st.caption("Панель обновляется при полном перезапуске скрипта. "
+                   "Перезапуски фрагментов попадают в накопленные метрики и выгрузку.")
+
+        st.markdown("**Текущий прогон**")
+        if metrics.histograms:
+            st.dataframe(_timers_table({name: h.to_dict() for name, h in metrics.histograms.items()}),
+                         use_container_width=True)
+
+        if metrics.counters:
+            cols = st.columns(len(metrics.counters))
+            for col, (name, value) in zip(cols, metrics.counters.items()):
+                with col:
+                    st.metric(name, value)
+
+        snapshot = metrics.registry.to_dict()
+        st.markdown("**С начала работы процесса**")
+        if snapshot['timers']:
+            st.dataframe(_timers_table(snapshot['timers']), use_container_width=True)
+        if snapshot['counters']:
+            st.json(snapshot['counters'])
+
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button("Скачать JSON", metrics.registry.to_json(),
+                               file_name="metrics.json", mime="application/json")
+        with col2:
+            st.download_button("Скачать Prometheus", metrics.registry.to_prometheus(),
+                               file_name="metrics.prom", mime="text/plain")
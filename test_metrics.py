@@ -0,0 +1,89 @@
+import json
+
+import pytest
+
+from metrics import Histogram, Metrics, Registry
+
+
+def test_histogram_buckets_are_cumulative():
+    hist = Histogram(buckets=(0.1, 1.0))
+    hist.observe(0.05)
+    hist.observe(0.5)
+    hist.observe(2.0)
+
+    assert hist.bucket_counts == [1, 2]
+    assert hist.count == 3
+    assert hist.sum == pytest.approx(2.55)
+    assert hist.max == 2.0
+
+
+def test_to_prometheus_format():
+    registry = Registry()
+    registry.inc('frames_decoded', 3)
+    registry.observe('inference', 0.002)
+
+    lines = registry.to_prometheus().splitlines()
+
+    assert "# TYPE dashboard_frames_decoded_total counter" in lines
+    assert "dashboard_frames_decoded_total 3" in lines
+    assert "# TYPE dashboard_inference_seconds histogram" in lines
+    assert 'dashboard_inference_seconds_bucket{le="0.001"} 0' in lines
+    assert 'dashboard_inference_seconds_bucket{le="0.005"} 1' in lines
+    assert 'dashboard_inference_seconds_bucket{le="+Inf"} 1' in lines
+    assert "dashboard_inference_seconds_sum 0.002" in lines
+    assert "dashboard_inference_seconds_count 1" in lines
+
+
+def test_export_format_by_extension(tmp_path):
+    registry = Registry()
+    registry.inc('rows_aggregated', 21)
+
+    json_path = tmp_path / "metrics.json"
+    prom_path = tmp_path / "metrics.prom"
+    registry.export(str(json_path))
+    registry.export(str(prom_path))
+
+    assert json.loads(json_path.read_text(encoding='utf-8'))['counters'] == {'rows_aggregated': 21}
+    assert "dashboard_rows_aggregated_total 21" in prom_path.read_text(encoding='utf-8')
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["metrics.json", "metrics.prom"]
+    assert prom_path.stat().st_mode & 0o777 == 0o644
+
+
+def test_counters_accumulate_across_runs():
+    registry = Registry()
+    for _ in range(2):
+        run = Metrics(enabled=True, registry=registry)
+        run.inc('frames_decoded', 10)
+        run.finish()
+
+    assert run.counters == {'frames_decoded': 10}
+    assert registry.counters == {'frames_decoded': 20}
+    assert registry.histograms['rerun'].count == 2
+
+
+def test_disabled_records_nothing():
+    registry = Registry()
+    run = Metrics(enabled=False, registry=registry)
+    run.inc('frames_decoded')
+    run.observe('inference', 0.1)
+    with run.timer('charts'):
+        pass
+    run.finish()
+
+    assert run.counters == {} and run.histograms == {}
+    assert registry.to_dict() == {'counters': {}, 'timers': {}}
+
+
+def test_fragment_timer_after_finish_records_into_registry(tmp_path, monkeypatch):
+    path = tmp_path / "metrics.json"
+    monkeypatch.setenv("DASHBOARD_METRICS_EXPORT", str(path))
+    registry = Registry()
+    run = Metrics(enabled=True, registry=registry)
+    run.finish()
+
+    with run.fragment_timer():
+        pass
+
+    assert 'fragment' not in run.histograms
+    assert registry.histograms['fragment'].count == 1
+    assert json.loads(path.read_text(encoding='utf-8'))['timers']['fragment']['count'] == 1